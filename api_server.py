@@ -4,19 +4,30 @@ Financiera Ancestral API Server
 Secure Flask API for serving financial data with rate limiting and caching
 """
 
+import csv
+import gzip
+import hashlib
+import io
 import os
 import json
 import logging
+import queue
+import threading
 import time
+from collections import OrderedDict, defaultdict, deque
+from contextlib import closing, contextmanager
 from datetime import datetime, timedelta
 from functools import wraps
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
 from typing import Dict, Any, Optional
 
 import sqlite3
-from flask import Flask, jsonify, request, send_from_directory, abort
+import orjson
+from flask import Flask, request, send_from_directory, abort
 from flask_cors import CORS
-import pandas as pd
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 # Configure logging
 logging.basicConfig(
@@ -29,105 +40,289 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Explicit column list shared by all stock_data row queries; avoids the
+# per-query `*` expansion and keeps the response shape stable even if the
+# table grows internal columns.
+STOCK_COLUMNS = ('symbol', 'company_name', 'sector', 'market', 'decade',
+                 'start_date', 'end_date', 'start_price', 'end_price',
+                 'total_return', 'avg_volume', 'volatility', 'data_points')
+SQL_STOCK_SELECT = f"SELECT {', '.join(STOCK_COLUMNS)} FROM stock_data"
+
+MARKET_COL = STOCK_COLUMNS.index('market')
+
+VALID_DECADES = frozenset({'1920s', '1930s', '1940s', '1950s', '1960s', '1970s',
+                           '1980s', '1990s', '2000s', '2010s', '2020s'})
+VALID_MARKETS = frozenset({'NYSE', 'Frankfurt', 'Tokyo', 'Hong Kong'})
+
+SQL_DECADES_LIST = 'SELECT DISTINCT decade FROM stock_data ORDER BY decade'
+SQL_MARKETS_LIST = 'SELECT DISTINCT market FROM stock_data ORDER BY market'
+SQL_DECADE_DATA = SQL_STOCK_SELECT + ' WHERE decade = ? ORDER BY market, symbol'
+SQL_SYMBOL_DATA = SQL_STOCK_SELECT + ' WHERE symbol = ? COLLATE NOCASE ORDER BY decade'
+
+# Composite indexes matching the query shapes above; created once at startup
+STARTUP_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS idx_stock_decade ON stock_data(decade, market, symbol)',
+    'CREATE INDEX IF NOT EXISTS idx_stock_market ON stock_data(market, decade, symbol)',
+    'CREATE INDEX IF NOT EXISTS idx_stock_symbol_nocase ON stock_data(symbol COLLATE NOCASE)',
+    'CREATE INDEX IF NOT EXISTS idx_top_return ON stock_data(decade, market, total_return DESC)',
+)
+
+def ensure_indexes(database_path: str):
+    """Create the query-shape indexes and refresh planner statistics"""
+    try:
+        with closing(sqlite3.connect(database_path)) as conn, conn:
+            for statement in STARTUP_INDEXES:
+                conn.execute(statement)
+            conn.execute('ANALYZE')
+    except sqlite3.Error as e:
+        logger.warning(f"Index creation skipped: {e}")
+
+STATS_FIELDS = ('total_stocks', 'avg_return', 'max_return', 'min_return',
+                'avg_volatility', 'markets_count', 'decades_count')
+SQL_STATS_AGG = ('COUNT(*), AVG(total_return), MAX(total_return), MIN(total_return), '
+                 'AVG(volatility), COUNT(DISTINCT market), COUNT(DISTINCT decade)')
+
+def build_stats_cube(conn) -> dict:
+    """Precompute statistics for every (decade, market) filter combination.
+
+    SQLite has no GROUPING SETS, so the four grouping levels are covered
+    by four grouped queries over the same table.
+    """
+    cube = {}
+    groupings = (
+        ('decade, market', 2),
+        ('decade', 1),
+        ('market', 1),
+        (None, 0),
+    )
+    for group_expr, width in groupings:
+        if group_expr:
+            sql = f'SELECT {group_expr}, {SQL_STATS_AGG} FROM stock_data GROUP BY {group_expr}'
+        else:
+            sql = f'SELECT {SQL_STATS_AGG} FROM stock_data'
+
+        for row in conn.execute(sql):
+            stats = dict(zip(STATS_FIELDS, row[width:]))
+            for field in ('avg_return', 'max_return', 'min_return', 'avg_volatility'):
+                if stats[field] is not None:
+                    stats[field] = round(stats[field], 2)
+
+            if group_expr == 'decade, market':
+                key = (row[0], row[1])
+            elif group_expr == 'decade':
+                key = (row[0], None)
+            elif group_expr == 'market':
+                key = (None, row[0])
+            else:
+                key = (None, None)
+            cube[key] = stats
+    return cube
+
+# Response timestamps only need second granularity; memoize the formatted
+# string so cache-miss paths don't allocate a datetime per request
+_NOW_CACHE = [0.0, '']
+
+def iso_now() -> str:
+    """datetime.now().isoformat() memoized at one-second granularity"""
+    now = time.time()
+    if now - _NOW_CACHE[0] >= 1.0:
+        _NOW_CACHE[0] = now
+        _NOW_CACHE[1] = datetime.now().isoformat()
+    return _NOW_CACHE[1]
+
+def rows_to_dicts(cursor) -> list:
+    """Convert fetched rows to dicts, reading the cursor description once"""
+    cols = [d[0] for d in cursor.description]
+    return [dict(zip(cols, row)) for row in cursor.fetchall()]
+
 class RateLimiter:
     """Simple in-memory rate limiter"""
     
+    # Run the global sweep at most once per this many calls (or when the
+    # IP table grows past the size threshold), instead of on every request.
+    SWEEP_INTERVAL = 10_000
+    MAX_TRACKED_IPS = 10_000
+
     def __init__(self, max_requests: int = 100, window_minutes: int = 15):
         self.max_requests = max_requests
         self.window_seconds = window_minutes * 60
-        self.requests = {}
-    
+        self.requests = defaultdict(deque)
+        self._lock = threading.Lock()
+        self._calls = 0
+
     def is_allowed(self, client_ip: str) -> bool:
         """Check if client is within rate limits"""
         current_time = time.time()
-        
-        # Clean old entries
         cutoff_time = current_time - self.window_seconds
-        self.requests = {
-            ip: timestamps for ip, timestamps in self.requests.items()
-            if any(ts > cutoff_time for ts in timestamps)
-        }
-        
-        # Update client's request history
-        if client_ip not in self.requests:
-            self.requests[client_ip] = []
-        
-        # Remove old timestamps for this client
-        self.requests[client_ip] = [
-            ts for ts in self.requests[client_ip] 
-            if ts > cutoff_time
-        ]
-        
-        # Check if under limit
-        if len(self.requests[client_ip]) >= self.max_requests:
-            return False
-        
-        # Add current request
-        self.requests[client_ip].append(current_time)
-        return True
+
+        with self._lock:
+            self._calls += 1
+            if self._calls >= self.SWEEP_INTERVAL or len(self.requests) > self.MAX_TRACKED_IPS:
+                self._sweep(cutoff_time)
+
+            # Drop expired timestamps for this client only
+            timestamps = self.requests[client_ip]
+            while timestamps and timestamps[0] <= cutoff_time:
+                timestamps.popleft()
+
+            # Check if under limit
+            if len(timestamps) >= self.max_requests:
+                return False
+
+            # Add current request
+            timestamps.append(current_time)
+            return True
+
+    def _sweep(self, cutoff_time: float):
+        """Drop IPs whose entire window has expired (caller holds the lock)"""
+        self._calls = 0
+        stale = [ip for ip, timestamps in self.requests.items()
+                 if not timestamps or timestamps[-1] <= cutoff_time]
+        for ip in stale:
+            del self.requests[ip]
+
+SECURITY_HEADERS = (
+    ('X-Content-Type-Options', 'nosniff'),
+    ('X-Frame-Options', 'DENY'),
+    ('X-XSS-Protection', '1; mode=block'),
+    ('Strict-Transport-Security', 'max-age=31536000; includeSubDomains'),
+    ('Content-Security-Policy',
+     "default-src 'self'; "
+     "script-src 'self' 'unsafe-inline' https://cdnjs.cloudflare.com; "
+     "style-src 'self' 'unsafe-inline' https://fonts.googleapis.com; "
+     "font-src 'self' https://fonts.gstatic.com; "
+     "img-src 'self' data: https:; "
+     "connect-src 'self'"),
+)
 
 class SecurityHeaders:
     """Add security headers to responses"""
-    
+
     @staticmethod
     def add_headers(response):
         """Add security headers to Flask response"""
-        response.headers['X-Content-Type-Options'] = 'nosniff'
-        response.headers['X-Frame-Options'] = 'DENY'
-        response.headers['X-XSS-Protection'] = '1; mode=block'
-        response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
-        response.headers['Content-Security-Policy'] = (
-            "default-src 'self'; "
-            "script-src 'self' 'unsafe-inline' https://cdnjs.cloudflare.com; "
-            "style-src 'self' 'unsafe-inline' https://fonts.googleapis.com; "
-            "font-src 'self' https://fonts.gstatic.com; "
-            "img-src 'self' data: https:; "
-            "connect-src 'self'"
-        )
+        response.headers.extend(SECURITY_HEADERS)
         return response
 
+class ConnectionPool:
+    """Bounded pool of pre-opened read-only SQLite connections"""
+
+    def __init__(self, database_path: str, pool_size: int = 25):
+        self.database_path = database_path
+        self._pool = queue.Queue(maxsize=pool_size)
+        for _ in range(pool_size):
+            self._pool.put(self._open_connection())
+
+    def _open_connection(self):
+        try:
+            # The API never writes: a read-only shared-cache connection
+            # skips writer-lock acquisition and shares one page cache
+            # across the pool
+            conn = sqlite3.connect(
+                f'file:{self.database_path}?mode=ro&cache=shared',
+                uri=True,
+                check_same_thread=False,
+                isolation_level=None
+            )
+            conn.execute('PRAGMA query_only=ON')
+        except sqlite3.OperationalError:
+            # Database not created yet; fall back to a regular connection
+            conn = sqlite3.connect(
+                self.database_path,
+                check_same_thread=False,
+                isolation_level=None
+            )
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA cache_size=-65536')
+        conn.execute('PRAGMA mmap_size=1073741824')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+
+    @contextmanager
+    def acquire(self):
+        """Borrow a connection from the pool, returning it on exit"""
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
 class DataCache:
-    """Simple file-based cache for API responses"""
-    
-    def __init__(self, cache_dir: str = "cache", ttl_minutes: int = 60):
-        self.cache_dir = Path(cache_dir)
-        self.cache_dir.mkdir(exist_ok=True)
+    """In-memory LRU cache for pre-serialized API responses.
+
+    Entries are tied to the database file's mtime: if the database has not
+    changed, an expired entry is refreshed in place instead of re-queried;
+    if it has changed, the entry is dropped immediately regardless of TTL.
+    """
+
+    # How long to trust the last stat() of the database file
+    STAT_TTL = 1.0
+
+    def __init__(self, database_path: str, ttl_minutes: int = 60, max_entries: int = 512):
+        self.database_path = database_path
         self.ttl_seconds = ttl_minutes * 60
-    
-    def get(self, key: str) -> Optional[Dict]:
-        """Get cached data if valid"""
-        cache_file = self.cache_dir / f"{key}.json"
-        
-        if not cache_file.exists():
-            return None
-        
-        try:
-            # Check if cache is still valid
-            if time.time() - cache_file.stat().st_mtime > self.ttl_seconds:
-                cache_file.unlink()
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple] = OrderedDict()
+        self._lock = threading.RLock()
+        self._db_mtime = 0
+        self._db_mtime_checked = 0.0
+
+    def _current_db_mtime(self, now: float) -> int:
+        """st_mtime_ns of the database, re-stat'ed at most once per second"""
+        if now - self._db_mtime_checked >= self.STAT_TTL:
+            self._db_mtime_checked = now
+            try:
+                self._db_mtime = os.stat(self.database_path).st_mtime_ns
+            except OSError:
+                self._db_mtime = 0
+        return self._db_mtime
+
+    def get(self, key: str) -> Optional[tuple]:
+        """Get a cached (raw, gzipped, etag) entry if still valid"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
                 return None
-            
-            with open(cache_file, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, OSError) as e:
-            logger.warning(f"Cache read error for {key}: {e}")
-            return None
-    
-    def set(self, key: str, data: Dict):
-        """Cache data"""
-        cache_file = self.cache_dir / f"{key}.json"
-        
-        try:
-            with open(cache_file, 'w') as f:
-                json.dump(data, f, default=str)
-        except OSError as e:
-            logger.warning(f"Cache write error for {key}: {e}")
+
+            now = time.time()
+            if entry[1] != self._current_db_mtime(now):
+                del self._entries[key]
+                return None
+
+            if entry[0] <= now:
+                # Database unchanged since the entry was built: extend the
+                # TTL rather than recomputing an identical payload
+                entry = (now + self.ttl_seconds,) + entry[1:]
+                self._entries[key] = entry
+
+            self._entries.move_to_end(key)
+            return entry[2:]
+
+    def set(self, key: str, data: Dict) -> tuple:
+        """Cache data, returning the (raw, gzipped, etag) entry"""
+        payload = orjson.dumps(data, default=str)
+        gzipped = gzip.compress(payload, 6)
+        etag = hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+        with self._lock:
+            now = time.time()
+            self._entries[key] = (now + self.ttl_seconds, self._current_db_mtime(now),
+                                  payload, gzipped, etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return payload, gzipped, etag
 
 def create_app(config: Dict[str, Any] = None) -> Flask:
     """Create and configure Flask application"""
     
     app = Flask(__name__)
-    
+
+    # Trust one proxy hop so request.remote_addr reflects the real client
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1)
+
     # Load configuration
     app.config.update({
         'SECRET_KEY': os.environ.get('SECRET_KEY', 'dev-key-change-in-production'),
@@ -136,6 +331,7 @@ def create_app(config: Dict[str, Any] = None) -> Flask:
         'RATE_LIMIT_REQUESTS': int(os.environ.get('RATE_LIMIT_REQUESTS', '100')),
         'RATE_LIMIT_WINDOW': int(os.environ.get('RATE_LIMIT_WINDOW', '15')),
         'CACHE_TTL': int(os.environ.get('CACHE_TTL', '60')),
+        'DB_POOL_SIZE': int(os.environ.get('DB_POOL_SIZE', '25')),
         'DEBUG': os.environ.get('FLASK_ENV') == 'development'
     })
     
@@ -148,7 +344,14 @@ def create_app(config: Dict[str, Any] = None) -> Flask:
         window_minutes=app.config['RATE_LIMIT_WINDOW']
     )
     
-    cache = DataCache(ttl_minutes=app.config['CACHE_TTL'])
+    cache = DataCache(app.config['DATABASE_PATH'], ttl_minutes=app.config['CACHE_TTL'])
+
+    ensure_indexes(app.config['DATABASE_PATH'])
+
+    db_pool = ConnectionPool(
+        app.config['DATABASE_PATH'],
+        pool_size=app.config['DB_POOL_SIZE']
+    )
     
     # Enable CORS with security settings
     CORS(app, 
@@ -156,45 +359,66 @@ def create_app(config: Dict[str, Any] = None) -> Flask:
          supports_credentials=False,
          max_age=3600)
     
+    # Statistics cube, rebuilt only when the database file changes
+    stats_state = {'mtime': None, 'cube': {}}
+    stats_lock = threading.Lock()
+
+    def get_stats_cube() -> dict:
+        """Return the (decade, market) statistics cube, rebuilding on DB change"""
+        try:
+            mtime = os.stat(app.config['DATABASE_PATH']).st_mtime_ns
+        except OSError:
+            mtime = 0
+
+        with stats_lock:
+            if stats_state['mtime'] != mtime:
+                with db_pool.acquire() as conn:
+                    stats_state['cube'] = build_stats_cube(conn)
+                stats_state['mtime'] = mtime
+            return stats_state['cube']
+
     def require_rate_limit(f):
         """Decorator to enforce rate limiting"""
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            client_ip = request.environ.get('HTTP_X_FORWARDED_FOR', request.remote_addr)
-            
+            client_ip = request.remote_addr
+
             if not rate_limiter.is_allowed(client_ip):
                 logger.warning(f"Rate limit exceeded for {client_ip}")
-                response = jsonify({
+                response = json_response({
                     'error': 'Rate limit exceeded',
                     'message': f'Maximum {app.config["RATE_LIMIT_REQUESTS"]} requests per {app.config["RATE_LIMIT_WINDOW"]} minutes'
-                })
-                response.status_code = 429
+                }, status=429)
                 return SecurityHeaders.add_headers(response)
             
             return f(*args, **kwargs)
         return decorated_function
     
-    def validate_decade(decade: str) -> bool:
-        """Validate decade parameter"""
-        valid_decades = ['1920s', '1930s', '1940s', '1950s', '1960s', '1970s', 
-                        '1980s', '1990s', '2000s', '2010s', '2020s']
-        return decade in valid_decades
-    
-    def validate_market(market: str) -> bool:
-        """Validate market parameter"""
-        valid_markets = ['NYSE', 'Frankfurt', 'Tokyo', 'Hong Kong']
-        return market in valid_markets
-    
-    def get_db_connection():
-        """Get database connection"""
-        try:
-            conn = sqlite3.connect(app.config['DATABASE_PATH'])
-            conn.row_factory = sqlite3.Row
-            return conn
-        except sqlite3.Error as e:
-            logger.error(f"Database connection error: {e}")
-            raise
-    
+    def json_response(obj, status: int = 200):
+        """Serialize obj with orjson and wrap it in a JSON response"""
+        return app.response_class(
+            orjson.dumps(obj, default=str),
+            status=status,
+            mimetype='application/json'
+        )
+
+    def json_bytes_response(entry: tuple):
+        """Build a JSON response from a cache entry, honoring conditional
+        and content-encoding request headers"""
+        payload, gzipped, etag = entry
+
+        if request.headers.get('If-None-Match') == etag:
+            return app.response_class(status=304, headers={'ETag': etag})
+
+        if 'gzip' in request.headers.get('Accept-Encoding', ''):
+            response = app.response_class(gzipped, mimetype='application/json')
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = app.response_class(payload, mimetype='application/json')
+
+        response.headers['ETag'] = etag
+        return response
+
     @app.after_request
     def after_request(response):
         """Add security headers to all responses"""
@@ -203,256 +427,251 @@ def create_app(config: Dict[str, Any] = None) -> Flask:
     @app.errorhandler(404)
     def not_found(error):
         """Handle 404 errors"""
-        response = jsonify({
+        return json_response({
             'error': 'Not found',
             'message': 'The requested resource was not found'
-        })
-        response.status_code = 404
-        return response
+        }, status=404)
     
     @app.errorhandler(500)
     def internal_error(error):
         """Handle 500 errors"""
         logger.error(f"Internal server error: {error}")
-        response = jsonify({
+        return json_response({
             'error': 'Internal server error',
             'message': 'An unexpected error occurred'
-        })
-        response.status_code = 500
-        return response
-    
+        }, status=500)
+    
+    # Read the frontend once at factory time; it only changes on deploy
+    try:
+        index_bytes = (Path(app.root_path) / 'financiera_frontend_v2.html').read_bytes()
+        index_gzipped = gzip.compress(index_bytes, 6)
+        index_etag = hashlib.blake2b(index_bytes, digest_size=16).hexdigest()
+    except OSError as e:
+        logger.warning(f"Could not preload frontend: {e}")
+        index_bytes = index_gzipped = index_etag = None
+
     @app.route('/')
     def index():
         """Serve main application"""
-        return send_from_directory('.', 'financiera_frontend_v2.html')
+        if index_bytes is None:
+            return send_from_directory('.', 'financiera_frontend_v2.html')
+
+        if request.headers.get('If-None-Match') == index_etag:
+            return app.response_class(status=304, headers={'ETag': index_etag})
+
+        if 'gzip' in request.headers.get('Accept-Encoding', ''):
+            response = app.response_class(index_gzipped, mimetype='text/html')
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = app.response_class(index_bytes, mimetype='text/html')
+
+        response.headers['ETag'] = index_etag
+        response.headers['Cache-Control'] = 'public, max-age=3600'
+        return response
     
     @app.route('/api/health')
     def health_check():
         """Health check endpoint"""
         try:
             # Check database connection
-            with get_db_connection() as conn:
+            with db_pool.acquire() as conn:
                 conn.execute('SELECT 1').fetchone()
             
-            return jsonify({
+            return json_response({
                 'status': 'healthy',
                 'timestamp': datetime.now().isoformat(),
                 'version': '2.0'
             })
         except Exception as e:
             logger.error(f"Health check failed: {e}")
-            response = jsonify({
+            return json_response({
                 'status': 'unhealthy',
                 'timestamp': datetime.now().isoformat(),
                 'error': str(e)
-            })
-            response.status_code = 503
-            return response
+            }, status=503)
     
     @app.route('/api/data/decades')
     @require_rate_limit
     def get_decades():
         """Get list of available decades"""
         cache_key = "decades_list"
-        cached_data = cache.get(cache_key)
-        
-        if cached_data:
-            return jsonify(cached_data)
+        cached_entry = cache.get(cache_key)
+
+        if cached_entry:
+            return json_bytes_response(cached_entry)
         
         try:
-            with get_db_connection() as conn:
-                cursor = conn.execute(
-                    'SELECT DISTINCT decade FROM stock_data ORDER BY decade'
-                )
-                decades = [row['decade'] for row in cursor.fetchall()]
+            with db_pool.acquire() as conn:
+                cursor = conn.execute(SQL_DECADES_LIST)
+                decades = [row[0] for row in cursor.fetchall()]
             
             data = {
                 'decades': decades,
                 'count': len(decades),
-                'timestamp': datetime.now().isoformat()
+                'timestamp': iso_now()
             }
             
-            cache.set(cache_key, data)
-            return jsonify(data)
+            return json_bytes_response(cache.set(cache_key, data))
             
         except Exception as e:
             logger.error(f"Error fetching decades: {e}")
-            return jsonify({'error': 'Failed to fetch decades'}), 500
+            return json_response({'error': 'Failed to fetch decades'}, status=500)
     
     @app.route('/api/data/markets')
     @require_rate_limit
     def get_markets():
         """Get list of available markets"""
         cache_key = "markets_list"
-        cached_data = cache.get(cache_key)
-        
-        if cached_data:
-            return jsonify(cached_data)
+        cached_entry = cache.get(cache_key)
+
+        if cached_entry:
+            return json_bytes_response(cached_entry)
         
         try:
-            with get_db_connection() as conn:
-                cursor = conn.execute(
-                    'SELECT DISTINCT market FROM stock_data ORDER BY market'
-                )
-                markets = [row['market'] for row in cursor.fetchall()]
+            with db_pool.acquire() as conn:
+                cursor = conn.execute(SQL_MARKETS_LIST)
+                markets = [row[0] for row in cursor.fetchall()]
             
             data = {
                 'markets': markets,
                 'count': len(markets),
-                'timestamp': datetime.now().isoformat()
+                'timestamp': iso_now()
             }
             
-            cache.set(cache_key, data)
-            return jsonify(data)
+            return json_bytes_response(cache.set(cache_key, data))
             
         except Exception as e:
             logger.error(f"Error fetching markets: {e}")
-            return jsonify({'error': 'Failed to fetch markets'}), 500
+            return json_response({'error': 'Failed to fetch markets'}, status=500)
     
     @app.route('/api/data/decade/<decade>')
     @require_rate_limit
     def get_decade_data(decade):
         """Get all data for a specific decade"""
-        if not validate_decade(decade):
-            return jsonify({'error': 'Invalid decade parameter'}), 400
+        if decade not in VALID_DECADES:
+            return json_response({'error': 'Invalid decade parameter'}, status=400)
         
         cache_key = f"decade_{decade}"
-        cached_data = cache.get(cache_key)
-        
-        if cached_data:
-            return jsonify(cached_data)
+        cached_entry = cache.get(cache_key)
+
+        if cached_entry:
+            return json_bytes_response(cached_entry)
         
         try:
-            with get_db_connection() as conn:
-                cursor = conn.execute('''
-                    SELECT * FROM stock_data 
-                    WHERE decade = ? 
-                    ORDER BY market, symbol
-                ''', (decade,))
-                
-                stocks = []
-                for row in cursor.fetchall():
-                    stocks.append(dict(row))
-            
-            if not stocks:
-                return jsonify({'error': 'No data found for this decade'}), 404
-            
-            # Group by market
+            with db_pool.acquire() as conn:
+                rows = conn.execute(SQL_DECADE_DATA, (decade,)).fetchall()
+
+            if not rows:
+                return json_response({'error': 'No data found for this decade'}, status=404)
+
+            # Rows arrive ordered by market, so groupby yields each market's
+            # contiguous run in one C-level pass; transpose each run into
+            # column arrays instead of building one dict per row
             markets = {}
-            for stock in stocks:
-                market = stock['market']
-                if market not in markets:
-                    markets[market] = {
-                        'name': market,
-                        'stocks': [],
-                        'total_stocks': 0
-                    }
-                markets[market]['stocks'].append(stock)
-                markets[market]['total_stocks'] += 1
-            
+            for market, run in groupby(rows, key=itemgetter(MARKET_COL)):
+                grouped = list(run)
+                markets[market] = {
+                    'name': market,
+                    'stocks': dict(zip(STOCK_COLUMNS, (list(col) for col in zip(*grouped)))),
+                    'total_stocks': len(grouped)
+                }
+
             data = {
                 'decade': decade,
+                'columns': list(STOCK_COLUMNS),
                 'markets': markets,
-                'total_stocks': len(stocks),
-                'timestamp': datetime.now().isoformat()
+                'total_stocks': len(rows),
+                'timestamp': iso_now()
             }
             
-            cache.set(cache_key, data)
-            return jsonify(data)
+            return json_bytes_response(cache.set(cache_key, data))
             
         except Exception as e:
             logger.error(f"Error fetching decade data: {e}")
-            return jsonify({'error': 'Failed to fetch decade data'}), 500
+            return json_response({'error': 'Failed to fetch decade data'}, status=500)
     
     @app.route('/api/data/market/<market>')
     @require_rate_limit
     def get_market_data(market):
         """Get all data for a specific market"""
-        if not validate_market(market):
-            return jsonify({'error': 'Invalid market parameter'}), 400
+        if market not in VALID_MARKETS:
+            return json_response({'error': 'Invalid market parameter'}, status=400)
         
         decade = request.args.get('decade')
-        if decade and not validate_decade(decade):
-            return jsonify({'error': 'Invalid decade parameter'}), 400
+        if decade and decade not in VALID_DECADES:
+            return json_response({'error': 'Invalid decade parameter'}, status=400)
         
         cache_key = f"market_{market}_{decade or 'all'}"
-        cached_data = cache.get(cache_key)
-        
-        if cached_data:
-            return jsonify(cached_data)
+        cached_entry = cache.get(cache_key)
+
+        if cached_entry:
+            return json_bytes_response(cached_entry)
         
         try:
-            query = 'SELECT * FROM stock_data WHERE market = ?'
+            query = SQL_STOCK_SELECT + ' WHERE market = ?'
             params = [market]
-            
+
             if decade:
                 query += ' AND decade = ?'
                 params.append(decade)
-            
+
             query += ' ORDER BY decade, symbol'
-            
-            with get_db_connection() as conn:
+
+            with db_pool.acquire() as conn:
                 cursor = conn.execute(query, params)
-                stocks = [dict(row) for row in cursor.fetchall()]
+                stocks = rows_to_dicts(cursor)
             
             if not stocks:
-                return jsonify({'error': 'No data found for this market'}), 404
+                return json_response({'error': 'No data found for this market'}, status=404)
             
             data = {
                 'market': market,
                 'decade': decade,
                 'stocks': stocks,
                 'total_stocks': len(stocks),
-                'timestamp': datetime.now().isoformat()
+                'timestamp': iso_now()
             }
             
-            cache.set(cache_key, data)
-            return jsonify(data)
+            return json_bytes_response(cache.set(cache_key, data))
             
         except Exception as e:
             logger.error(f"Error fetching market data: {e}")
-            return jsonify({'error': 'Failed to fetch market data'}), 500
+            return json_response({'error': 'Failed to fetch market data'}, status=500)
     
     @app.route('/api/data/stock/<symbol>')
     @require_rate_limit
     def get_stock_data(symbol):
         """Get historical data for a specific stock"""
         if not symbol or len(symbol) > 10:
-            return jsonify({'error': 'Invalid symbol parameter'}), 400
+            return json_response({'error': 'Invalid symbol parameter'}, status=400)
         
         cache_key = f"stock_{symbol.upper()}"
-        cached_data = cache.get(cache_key)
-        
-        if cached_data:
-            return jsonify(cached_data)
+        cached_entry = cache.get(cache_key)
+
+        if cached_entry:
+            return json_bytes_response(cached_entry)
         
         try:
-            with get_db_connection() as conn:
-                cursor = conn.execute('''
-                    SELECT * FROM stock_data 
-                    WHERE UPPER(symbol) = UPPER(?) 
-                    ORDER BY decade
-                ''', (symbol,))
-                
-                stocks = [dict(row) for row in cursor.fetchall()]
+            with db_pool.acquire() as conn:
+                cursor = conn.execute(SQL_SYMBOL_DATA, (symbol,))
+                stocks = rows_to_dicts(cursor)
             
             if not stocks:
-                return jsonify({'error': 'No data found for this stock'}), 404
+                return json_response({'error': 'No data found for this stock'}, status=404)
             
             data = {
                 'symbol': symbol.upper(),
                 'company_name': stocks[0].get('company_name', ''),
                 'historical_data': stocks,
                 'decades_count': len(stocks),
-                'timestamp': datetime.now().isoformat()
+                'timestamp': iso_now()
             }
             
-            cache.set(cache_key, data)
-            return jsonify(data)
+            return json_bytes_response(cache.set(cache_key, data))
             
         except Exception as e:
             logger.error(f"Error fetching stock data: {e}")
-            return jsonify({'error': 'Failed to fetch stock data'}), 500
+            return json_response({'error': 'Failed to fetch stock data'}, status=500)
     
     @app.route('/api/data/top-performers')
     @require_rate_limit
@@ -462,36 +681,36 @@ def create_app(config: Dict[str, Any] = None) -> Flask:
         market = request.args.get('market')
         limit = min(int(request.args.get('limit', 10)), 50)  # Max 50 results
         
-        if decade and not validate_decade(decade):
-            return jsonify({'error': 'Invalid decade parameter'}), 400
+        if decade and decade not in VALID_DECADES:
+            return json_response({'error': 'Invalid decade parameter'}, status=400)
         
-        if market and not validate_market(market):
-            return jsonify({'error': 'Invalid market parameter'}), 400
+        if market and market not in VALID_MARKETS:
+            return json_response({'error': 'Invalid market parameter'}, status=400)
         
         cache_key = f"top_performers_{decade or 'all'}_{market or 'all'}_{limit}"
-        cached_data = cache.get(cache_key)
-        
-        if cached_data:
-            return jsonify(cached_data)
+        cached_entry = cache.get(cache_key)
+
+        if cached_entry:
+            return json_bytes_response(cached_entry)
         
         try:
-            query = 'SELECT * FROM stock_data WHERE 1=1'
+            query = SQL_STOCK_SELECT + ' WHERE 1=1'
             params = []
-            
+
             if decade:
                 query += ' AND decade = ?'
                 params.append(decade)
-            
+
             if market:
                 query += ' AND market = ?'
                 params.append(market)
-            
+
             query += ' ORDER BY total_return DESC LIMIT ?'
             params.append(limit)
-            
-            with get_db_connection() as conn:
+
+            with db_pool.acquire() as conn:
                 cursor = conn.execute(query, params)
-                stocks = [dict(row) for row in cursor.fetchall()]
+                stocks = rows_to_dicts(cursor)
             
             data = {
                 'top_performers': stocks,
@@ -501,15 +720,14 @@ def create_app(config: Dict[str, Any] = None) -> Flask:
                     'limit': limit
                 },
                 'count': len(stocks),
-                'timestamp': datetime.now().isoformat()
+                'timestamp': iso_now()
             }
             
-            cache.set(cache_key, data)
-            return jsonify(data)
+            return json_bytes_response(cache.set(cache_key, data))
             
         except Exception as e:
             logger.error(f"Error fetching top performers: {e}")
-            return jsonify({'error': 'Failed to fetch top performers'}), 500
+            return json_response({'error': 'Failed to fetch top performers'}, status=500)
     
     @app.route('/api/data/statistics')
     @require_rate_limit
@@ -518,64 +736,38 @@ def create_app(config: Dict[str, Any] = None) -> Flask:
         decade = request.args.get('decade')
         market = request.args.get('market')
         
-        if decade and not validate_decade(decade):
-            return jsonify({'error': 'Invalid decade parameter'}), 400
+        if decade and decade not in VALID_DECADES:
+            return json_response({'error': 'Invalid decade parameter'}, status=400)
         
-        if market and not validate_market(market):
-            return jsonify({'error': 'Invalid market parameter'}), 400
+        if market and market not in VALID_MARKETS:
+            return json_response({'error': 'Invalid market parameter'}, status=400)
         
         cache_key = f"statistics_{decade or 'all'}_{market or 'all'}"
-        cached_data = cache.get(cache_key)
-        
-        if cached_data:
-            return jsonify(cached_data)
+        cached_entry = cache.get(cache_key)
+
+        if cached_entry:
+            return json_bytes_response(cached_entry)
         
         try:
-            query = '''
-                SELECT 
-                    COUNT(*) as total_stocks,
-                    AVG(total_return) as avg_return,
-                    MAX(total_return) as max_return,
-                    MIN(total_return) as min_return,
-                    AVG(volatility) as avg_volatility,
-                    COUNT(DISTINCT market) as markets_count,
-                    COUNT(DISTINCT decade) as decades_count
-                FROM stock_data WHERE 1=1
-            '''
-            params = []
-            
-            if decade:
-                query += ' AND decade = ?'
-                params.append(decade)
-            
-            if market:
-                query += ' AND market = ?'
-                params.append(market)
-            
-            with get_db_connection() as conn:
-                cursor = conn.execute(query, params)
-                stats = dict(cursor.fetchone())
-            
-            # Round numeric values
-            for key in ['avg_return', 'max_return', 'min_return', 'avg_volatility']:
-                if stats[key] is not None:
-                    stats[key] = round(stats[key], 2)
-            
+            stats = get_stats_cube().get((decade or None, market or None))
+            if stats is None:
+                # No rows matched this filter combination
+                stats = dict(zip(STATS_FIELDS, (0, None, None, None, None, 0, 0)))
+
             data = {
                 'statistics': stats,
                 'filters': {
                     'decade': decade,
                     'market': market
                 },
-                'timestamp': datetime.now().isoformat()
+                'timestamp': iso_now()
             }
             
-            cache.set(cache_key, data)
-            return jsonify(data)
+            return json_bytes_response(cache.set(cache_key, data))
             
         except Exception as e:
             logger.error(f"Error fetching statistics: {e}")
-            return jsonify({'error': 'Failed to fetch statistics'}), 500
+            return json_response({'error': 'Failed to fetch statistics'}, status=500)
     
     @app.route('/api/data/export')
     @require_rate_limit
@@ -586,16 +778,16 @@ def create_app(config: Dict[str, Any] = None) -> Flask:
         format_type = request.args.get('format', 'csv').lower()
         
         if format_type not in ['csv', 'json']:
-            return jsonify({'error': 'Invalid format. Use csv or json'}), 400
+            return json_response({'error': 'Invalid format. Use csv or json'}, status=400)
         
-        if decade and not validate_decade(decade):
-            return jsonify({'error': 'Invalid decade parameter'}), 400
+        if decade and decade not in VALID_DECADES:
+            return json_response({'error': 'Invalid decade parameter'}, status=400)
         
-        if market and not validate_market(market):
-            return jsonify({'error': 'Invalid market parameter'}), 400
+        if market and market not in VALID_MARKETS:
+            return json_response({'error': 'Invalid market parameter'}, status=400)
         
         try:
-            query = 'SELECT * FROM stock_data WHERE 1=1'
+            query = SQL_STOCK_SELECT + ' WHERE 1=1'
             params = []
             
             if decade:
@@ -607,38 +799,71 @@ def create_app(config: Dict[str, Any] = None) -> Flask:
                 params.append(market)
             
             query += ' ORDER BY decade, market, symbol'
-            
-            with get_db_connection() as conn:
-                df = pd.read_sql_query(query, conn, params=params)
-            
-            if df.empty:
-                return jsonify({'error': 'No data found for export'}), 404
-            
+
+            with db_pool.acquire() as conn:
+                if conn.execute(query + ' LIMIT 1', params).fetchone() is None:
+                    return json_response({'error': 'No data found for export'}, status=404)
+
+            filename = f'financiera_data_{decade or "all"}_{market or "all"}.{format_type}'
+            headers = {'Content-Disposition': f'attachment; filename={filename}'}
+
             if format_type == 'csv':
-                csv_data = df.to_csv(index=False)
-                response = app.response_class(
-                    csv_data,
-                    mimetype='text/csv',
-                    headers={
-                        'Content-Disposition': f'attachment; filename=financiera_data_{decade or "all"}_{market or "all"}.csv'
-                    }
-                )
-                return response
+                def generate_csv():
+                    """Yield CSV in ~64KB chunks as rows are read from SQLite"""
+                    with db_pool.acquire() as conn:
+                        cursor = conn.execute(query, params)
+                        buffer = io.StringIO()
+                        writer = csv.writer(buffer)
+                        writer.writerow(STOCK_COLUMNS)
+                        for row in cursor:
+                            writer.writerow(row)
+                            if buffer.tell() > 65536:
+                                yield buffer.getvalue()
+                                buffer.seek(0)
+                                buffer.truncate()
+                        yield buffer.getvalue()
+
+                return app.response_class(generate_csv(), mimetype='text/csv', headers=headers)
             else:  # json
-                json_data = df.to_json(orient='records', indent=2)
-                response = app.response_class(
-                    json_data,
-                    mimetype='application/json',
-                    headers={
-                        'Content-Disposition': f'attachment; filename=financiera_data_{decade or "all"}_{market or "all"}.json'
-                    }
-                )
-                return response
-            
+                def generate_json():
+                    """Yield a JSON array one record at a time"""
+                    with db_pool.acquire() as conn:
+                        cursor = conn.execute(query, params)
+                        cols = [d[0] for d in cursor.description]
+                        prefix = b'['
+                        for row in cursor:
+                            yield prefix + orjson.dumps(dict(zip(cols, row)), default=str)
+                            prefix = b','
+                        yield b']'
+
+                return app.response_class(generate_json(), mimetype='application/json', headers=headers)
+
         except Exception as e:
             logger.error(f"Error exporting data: {e}")
-            return jsonify({'error': 'Failed to export data'}), 500
+            return json_response({'error': 'Failed to export data'}, status=500)
     
+    def warm_cache():
+        """Pre-populate the response cache so first user hits are memory hits"""
+        paths = ['/api/data/decades', '/api/data/markets',
+                 '/api/data/top-performers', '/api/data/statistics']
+        try:
+            with db_pool.acquire() as conn:
+                decades = [row[0] for row in conn.execute(SQL_DECADES_LIST)]
+                markets = [row[0] for row in conn.execute(SQL_MARKETS_LIST)]
+
+            paths += [f'/api/data/decade/{decade}' for decade in decades]
+            paths += [f'/api/data/market/{market}' for market in markets]
+
+            with app.test_client() as client:
+                for path in paths:
+                    client.get(path)
+
+            logger.info(f"Warmed cache with {len(paths)} endpoints")
+        except Exception as e:
+            logger.warning(f"Cache warm-up failed: {e}")
+
+    app.warm_cache = warm_cache
+
     return app
 
 def main():
@@ -661,7 +886,8 @@ def main():
     
     # Create and run app
     app = create_app(config)
-    
+    app.warm_cache()
+
     logger.info(f"Starting Financiera Ancestral API Server on {args.host}:{args.port}")
     logger.info(f"Debug mode: {args.debug}")
     
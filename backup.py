@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""Stream a backup of the database and logs into backups/."""
+import os
+import tarfile
+import time
+
+SOURCES = ("financiera_data.db", "logs")
+
+def main():
+    os.makedirs("backups", exist_ok=True)
+    stamp = time.strftime("%Y%m%d_%H%M%S")
+    try:
+        import zstandard
+        path = f"backups/financiera_backup_{stamp}.tar.zst"
+        compressor = zstandard.ZstdCompressor(threads=-1)
+        with open(path, "wb") as raw, compressor.stream_writer(raw) as stream:
+            with tarfile.open(fileobj=stream, mode="w|") as tar:
+                for source in SOURCES:
+                    if os.path.exists(source):
+                        tar.add(source)
+    except ImportError:
+        # zstandard not installed; gzip is slower but always available
+        path = f"backups/financiera_backup_{stamp}.tar.gz"
+        with tarfile.open(path, "w:gz") as tar:
+            for source in SOURCES:
+                if os.path.exists(source):
+                    tar.add(source)
+    print(f"Backup written to {path}")
+
+if __name__ == "__main__":
+    main()
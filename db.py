@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Shared SQLite connection factory for Financiera Ancestral.
+
+WAL mode persists in the database file once set, but mmap_size,
+cache_size, and temp_store are connection-local — every opener has to
+re-apply them to benefit, so all writers should go through connect().
+(The API server's read-only pool applies its own settings.)
+"""
+import sqlite3
+
+DB_PATH = "financiera_data.db"
+
+def connect(path: str = DB_PATH) -> sqlite3.Connection:
+    """Open a connection with the project's performance settings applied"""
+    conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-65536")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
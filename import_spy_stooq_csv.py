@@ -2,60 +2,76 @@
 """
 Import SPY historical data from Stooq CSV into financiera_data.db, grouped by decade.
 """
-import sqlite3
-import pandas as pd
-from datetime import datetime
+import csv
+
+import numpy as np
+
+import db
 
 DB_PATH = "financiera_data.db"
 CSV_PATH = "spy_us_d.csv"
 TICKER = "SPY"
 MARKET = "SPDR S&P 500 ETF"
 
-# Load CSV
-df = pd.read_csv(CSV_PATH)
+INSERT_SQL = '''
+    INSERT OR IGNORE INTO stock_data (
+        symbol, company_name, sector, market, decade, start_date, end_date,
+        start_price, end_price, total_return, avg_volume, volatility, data_points
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
 
 # Stooq CSV columns: Date,Open,High,Low,Close,Volume
-# Convert Date to datetime
-if 'Date' not in df.columns:
+with open(CSV_PATH, newline='') as f:
+    reader = csv.reader(f)
+    header = next(reader)
+    raw_rows = list(reader)
+
+if 'Date' not in header:
     raise ValueError("CSV must have a 'Date' column.")
-df['Date'] = pd.to_datetime(df['Date'])
-df = df.sort_values('Date')
-df['Year'] = df['Date'].dt.year
-def get_decade(year):
-    return f"{year//10*10}s"
-df['Decade'] = df['Year'].apply(get_decade)
+col = {name: i for i, name in enumerate(header)}
 
-decades = df['Decade'].unique()
+dates = np.array([r[col['Date']] for r in raw_rows], dtype='datetime64[D]')
+order = np.argsort(dates, kind='stable')
+dates = dates[order]
 
-conn = sqlite3.connect(DB_PATH)
-cursor = conn.cursor()
-rows_inserted = 0
-
-for decade in decades:
-    df_dec = df[df['Decade'] == decade]
-    if df_dec.empty:
-        continue
-    start_row = df_dec.iloc[0]
-    end_row = df_dec.iloc[-1]
-    start_date = start_row['Date'].strftime('%Y-%m-%d')
-    end_date = end_row['Date'].strftime('%Y-%m-%d')
-    start_price = float(start_row['Open'])
-    end_price = float(end_row['Close'])
-    total_return = (end_price - start_price) / start_price * 100
-    avg_volume = float(df_dec['Volume'].mean())
-    volatility = float(df_dec['Close'].std())
-    data_points = len(df_dec)
-    cursor.execute('''
-        INSERT OR IGNORE INTO stock_data (
-            symbol, company_name, sector, market, decade, start_date, end_date,
-            start_price, end_price, total_return, avg_volume, volatility, data_points
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        TICKER, 'SPDR S&P 500 ETF', 'ETF', MARKET, decade, start_date, end_date,
-        start_price, end_price, total_return, avg_volume, volatility, data_points
-    ))
-    rows_inserted += 1
+n = len(raw_rows)
+opens = np.fromiter((float(raw_rows[i][col['Open']]) for i in order), dtype=np.float64, count=n)
+closes = np.fromiter((float(raw_rows[i][col['Close']]) for i in order), dtype=np.float64, count=n)
+volumes = np.fromiter((float(raw_rows[i][col['Volume']]) for i in order), dtype=np.float64, count=n)
 
-conn.commit()
+years = dates.astype('datetime64[Y]').astype(int) + 1970
+decades = years // 10 * 10
+
+# Decades form contiguous runs on date-sorted data, so one reduceat per
+# aggregate covers every group without a per-decade Python pass
+uniq, starts = np.unique(decades, return_index=True)
+ends = np.append(starts[1:], n)
+counts = ends - starts
+
+avg_volumes = np.add.reduceat(volumes, starts) / counts
+close_means = np.add.reduceat(closes, starts) / counts
+close_sumsq = np.add.reduceat(closes * closes, starts)
+variances = (close_sumsq - counts * close_means ** 2) / np.maximum(counts - 1, 1)
+volatilities = np.sqrt(np.maximum(variances, 0.0))
+
+start_prices = opens[starts]
+end_prices = closes[ends - 1]
+total_returns = (end_prices - start_prices) / start_prices * 100
+
+rows = [
+    (TICKER, 'SPDR S&P 500 ETF', 'ETF', MARKET, f"{decade}s",
+     str(dates[start]), str(dates[end - 1]),
+     float(start_price), float(end_price), float(total_return),
+     float(avg_volume), float(volatility), int(count))
+    for decade, start, end, count, start_price, end_price, total_return, avg_volume, volatility
+    in zip(uniq, starts, ends, counts, start_prices, end_prices,
+           total_returns, avg_volumes, volatilities)
+]
+
+conn = db.connect(DB_PATH)
+cursor = conn.cursor()
+cursor.execute('BEGIN')
+cursor.executemany(INSERT_SQL, rows)
+cursor.execute('COMMIT')
 conn.close()
-print(f"✓ Imported SPY summary data for {rows_inserted} decades into {DB_PATH}")
+print(f"✓ Imported SPY summary data for {len(rows)} decades into {DB_PATH}")